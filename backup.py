@@ -3,44 +3,86 @@
 Unified backup script — dumps databases and uploads to Google Drive.
 
 To add a new backup target, append a dict to the JOBS list below.
-Each job defines how to dump and where to upload. Jobs run independently
-so one failure doesn't block the others.
+Each job defines how to dump and where to upload. Jobs run concurrently and
+independently so one failure doesn't block the others.
 """
 
 import argparse
+import functools
+import io
 import os
+import random
+import signal
 import subprocess
 import sys
 import time
 import json
-import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+import httplib2
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseUpload, MediaUpload
+
+try:
+    import orjson
+except ImportError:  # optional speedup; falls back to stdlib json
+    orjson = None
 
 # ---------------------------------------------------------------------------
 # Configuration — add new backup jobs here
 # ---------------------------------------------------------------------------
 
 CREDENTIALS_PATH = "/app/credentials/credentials.json"
-CHUNK_SIZE = 25 * 1024 * 1024  # 25 MB
+# Upload chunk size in bytes (default 100 MB). -1 buffers the whole dump in
+# memory and sends it in a single request.
+CHUNK_SIZE = int(os.environ.get("DRIVE_CHUNK_SIZE", 100 * 1024 * 1024))
+CHUNK_GRANULARITY = 256 * 1024  # Drive rejects non-final chunks of any other size
+if CHUNK_SIZE != -1 and (CHUNK_SIZE <= 0 or CHUNK_SIZE % CHUNK_GRANULARITY):
+    sys.exit(f"ERROR: DRIVE_CHUNK_SIZE must be -1 or a positive multiple of {CHUNK_GRANULARITY}, got {CHUNK_SIZE}")
+SIMPLE_UPLOAD_LIMIT = 5 * 1024 * 1024  # Drive's cap for non-resumable uploads
 SOCKET_TIMEOUT = 600  # seconds
+MAX_CHUNK_ATTEMPTS = 6
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+DUMP_TIMEOUT = 7200  # seconds
+
+# Compression for plain SQL dumps: "pigz" (multi-threaded gzip, default), "gzip" or "zstd"
+COMPRESSOR = os.environ.get("COMPRESSOR", "pigz")
+GZIP_LEVEL = os.environ.get("GZIP_LEVEL", "6")
+ZSTD_LEVEL = os.environ.get("ZSTD_LEVEL", "3")
+
+# compressor -> (pipeline command, file extension, mimetype)
+COMPRESSORS = {
+    "pigz": (f"pigz -p $(nproc) -{GZIP_LEVEL}", ".sql.gz", "application/gzip"),
+    "gzip": (f"gzip -{GZIP_LEVEL}", ".sql.gz", "application/gzip"),
+    "zstd": (f"zstd -T0 -{ZSTD_LEVEL} -q", ".sql.zst", "application/zstd"),
+}
+if COMPRESSOR not in COMPRESSORS:
+    sys.exit(f"ERROR: Unknown COMPRESSOR '{COMPRESSOR}'. Valid: {', '.join(COMPRESSORS)}")
+COMPRESS_CMD, COMPRESS_EXT, COMPRESS_MIMETYPE = COMPRESSORS[COMPRESSOR]
+
+# pg_dump compresses its custom-format output itself (levels 0-9)
+PG_COMPRESS_LEVEL = os.environ.get("PG_COMPRESS_LEVEL", "3")
 
 JOBS = [
     {
         "name": "teslamate",
         "dump_cmd": (
+            # Custom format compresses in-process and restores with pg_restore
             "nice -n 19 ionice -c3 "
-            "pg_dump -h {PG_HOST} -p {PG_PORT} -U {PG_USER} {PG_DATABASE} "
-            "| gzip"
+            f"pg_dump -Fc -Z {PG_COMPRESS_LEVEL} "
+            "-h {PG_HOST} -p {PG_PORT} -U {PG_USER} {PG_DATABASE}"
         ),
         "env_vars": {
             "PGPASSWORD": "PG_PASSWORD",  # maps env var name -> os.environ key
         },
-        "file_ext": ".sql.gz",
+        "file_ext": ".dump",
+        "mimetype": "application/octet-stream",
         "token_path": "/app/credentials/teslamate_token.json",
         "drive_folder_id_env": "TESLAMATE_DRIVE_FOLDER_ID",
     },
@@ -53,10 +95,11 @@ JOBS = [
             "--quick --single-transaction --max_allowed_packet=64M "
             "--routines --triggers --events "
             "{MYSQL_DATABASE} "
-            "| gzip"
+            f"| {COMPRESS_CMD}"
         ),
         "env_vars": {},
-        "file_ext": ".sql.gz",
+        "file_ext": COMPRESS_EXT,
+        "mimetype": COMPRESS_MIMETYPE,
         "token_path": "/app/credentials/stocks_token.json",
         "drive_folder_id_env": "STOCKS_DRIVE_FOLDER_ID",
     },
@@ -68,8 +111,9 @@ JOBS = [
 
 def authenticate(token_path: str) -> Credentials:
     """Load and refresh OAuth credentials from token file."""
-    with open(token_path, "r") as f:
-        creds_json = json.load(f)
+    with open(token_path, "rb") as f:
+        data = f.read()
+    creds_json = orjson.loads(data) if orjson else json.loads(data)
 
     creds = Credentials.from_authorized_user_info(creds_json)
     creds.token = creds_json["token"]
@@ -78,129 +122,274 @@ def authenticate(token_path: str) -> Credentials:
         print(f"  Refreshing expired token: {token_path}")
         creds.refresh(Request())
         # Persist the refreshed token
-        with open(token_path, "w") as f:
-            json.dump(json.loads(creds.to_json()), f, indent=2)
+        if orjson:
+            data = orjson.dumps(orjson.loads(creds.to_json()), option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(json.loads(creds.to_json()), indent=2).encode()
+        with open(token_path, "wb") as f:
+            f.write(data)
 
     return creds
 
 
-def upload_to_drive(file_path: str, folder_id: str, creds: Credentials) -> str:
-    """Upload a file to Google Drive with chunked resumable upload. Returns file ID."""
-    socket.setdefaulttimeout(SOCKET_TIMEOUT)
-    service = build("drive", "v3", credentials=creds)
+_credentials_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def _credentials(token_path: str) -> Credentials:
+    """Return OAuth credentials for a token file, loaded (and refreshed) once."""
+    return authenticate(token_path)
+
+
+def _drive_service(token_path: str):
+    """Return an authenticated Drive client for one job.
+
+    httplib2 connections aren't thread-safe, so every call gets its own
+    AuthorizedHttp; only the credentials are shared between jobs.
+    """
+    # The lock keeps two jobs on one token file from refreshing and
+    # rewriting it at the same time
+    with _credentials_lock:
+        creds = _credentials(token_path)
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=SOCKET_TIMEOUT))
+    return build("drive", "v3", http=http, cache_discovery=False)
+
+
+class _PipeUpload(MediaUpload):
+    """Resumable media upload that reads from a non-seekable stream.
+
+    The dump is piped straight into Drive, so the total size is unknown until
+    the stream hits EOF. Bytes are read on demand one chunk at a time, and the
+    current chunk stays buffered until the server acknowledges it so a failed
+    chunk can be re-sent.
+    """
+
+    def __init__(self, stream, mimetype: str, chunksize: int = CHUNK_SIZE):
+        super().__init__()
+        self._stream = stream
+        self._mimetype = mimetype
+        self._chunksize = chunksize
+        self._buffer = b""
+        self._buffer_start = 0
+        self._eof = False
+
+    def chunksize(self):
+        # googleapiclient treats a read shorter than chunksize() as the final
+        # chunk. Once EOF has been seen, report one byte more than was asked
+        # for so a stream ending exactly on a chunk boundary is still finalized
+        # instead of being followed by an empty, unterminated PUT.
+        return self._chunksize + 1 if self._eof else self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def size(self):
+        return None
+
+    def resumable(self):
+        return True
+
+    def getbytes(self, begin, length):
+        # Everything before `begin` has been acknowledged by the server
+        self._buffer = self._buffer[begin - self._buffer_start:]
+        self._buffer_start = begin
+
+        while len(self._buffer) <= length and not self._eof:
+            data = self._stream.read(length + 1 - len(self._buffer))
+            if not data:
+                self._eof = True
+            self._buffer += data
+
+        return self._buffer[:length]
 
+
+def upload_to_drive(name: str, stream, file_name: str, folder_id: str,
+                    service, mimetype: str = "application/gzip") -> str:
+    """Stream data to Google Drive with chunked resumable upload. Returns file ID."""
     file_metadata = {
-        "name": os.path.basename(file_path),
+        "name": file_name,
         "parents": [folder_id],
     }
-    media = MediaFileUpload(file_path, chunksize=CHUNK_SIZE, resumable=True)
+    if CHUNK_SIZE == -1:
+        data = stream.read()
+        media = MediaIoBaseUpload(
+            io.BytesIO(data), mimetype, chunksize=-1,
+            resumable=len(data) > SIMPLE_UPLOAD_LIMIT,
+        )
+    else:
+        media = _PipeUpload(stream, mimetype)
 
     request = service.files().create(body=file_metadata, media_body=media, fields="id")
 
-    file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-    bar_width = 30
-    last_milestone = -1
-
-    response = None
+    chunks = 0
+    response = None if media.resumable() else request.execute()
     while response is None:
-        status, response = request.next_chunk()
+        status, response = _next_chunk(name, request)
         if status:
-            pct = status.progress() * 100
-            milestone = int(pct // 5) * 5
-            if milestone > last_milestone:
-                last_milestone = milestone
-                filled = int(bar_width * pct / 100)
-                bar = "█" * filled + "░" * (bar_width - filled)
-                uploaded_mb = file_size_mb * pct / 100
-                print(f"  [{bar}] {pct:5.1f}%  ({uploaded_mb:.0f}/{file_size_mb:.0f} MB)")
+            chunks += 1
+            uploaded_mb = status.resumable_progress / (1024 * 1024)
+            _log(name, f"Uploaded {chunks} chunk(s), {uploaded_mb:.0f} MB so far")
 
     file_id = response.get("id")
-    print(f"  [{('█' * bar_width)}] 100.0%  Upload complete. Drive file ID: {file_id}")
+    _log(name, f"Upload complete. Drive file ID: {file_id}")
     return file_id
 
 
+def _next_chunk(name: str, request):
+    """Send the next upload chunk, backing off on transient errors.
+
+    The client library retries 429/5xx itself (num_retries); this adds a
+    longer backoff on top and also covers dropped connections and socket
+    timeouts. After a network error the library asks Drive how much it
+    received and resumes from there rather than restarting the upload.
+    """
+    for attempt in range(MAX_CHUNK_ATTEMPTS):
+        try:
+            return request.next_chunk(num_retries=3)
+        except HttpError as e:
+            if e.resp.status not in RETRYABLE_STATUSES or attempt == MAX_CHUNK_ATTEMPTS - 1:
+                raise
+            reason = f"HTTP {e.resp.status}"
+        except (OSError, httplib2.HttpLib2Error) as e:
+            if attempt == MAX_CHUNK_ATTEMPTS - 1:
+                raise
+            reason = f"{type(e).__name__}: {e}"
+        delay = min(60, 2 ** attempt) + random.random()
+        _log(name, f"Chunk upload failed ({reason}), retrying in {delay:.0f}s")
+        time.sleep(delay)
+
+
+def delete_from_drive(file_id: str, service):
+    """Delete a file from Google Drive (used to discard incomplete backups)."""
+    service.files().delete(fileId=file_id).execute()
+
+
 # ---------------------------------------------------------------------------
 # Backup logic
 # ---------------------------------------------------------------------------
 
-def run_job(job: dict) -> bool:
-    """Execute a single backup job (dump + upload). Returns True on success."""
-    name = job["name"]
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
-    dump_file = f"/tmp/{name}_{timestamp}{job['file_ext']}"
-
-    print(f"\n{'='*60}")
-    print(f"[{timestamp}] Starting backup: {name}")
-    print(f"{'='*60}")
+def _prepare_job(job: dict) -> bool:
+    """Resolve a job's dump command and subprocess env once, before it runs.
 
-    # --- Dump ---
+    Stores them as job["_cmd"] and job["_env"]. Returns False if a required
+    environment variable is missing.
+    """
     try:
-        cmd = job["dump_cmd"].format(**os.environ)
+        job["_cmd"] = job["dump_cmd"].format(**os.environ)
+        # Extra env vars needed by the dump tool (e.g. PGPASSWORD)
+        extra_env = {k: os.environ[v] for k, v in job.get("env_vars", {}).items()}
     except KeyError as e:
-        print(f"  ERROR: Missing environment variable: {e}")
+        _log(job["name"], f"ERROR: Missing environment variable: {e}")
         return False
 
-    # Set extra env vars needed by the dump tool (e.g. PGPASSWORD)
-    dump_env = os.environ.copy()
-    for env_key, source_key in job.get("env_vars", {}).items():
-        dump_env[env_key] = os.environ[source_key]
+    # None lets the dump inherit our environment without copying it
+    job["_env"] = {**os.environ, **extra_env} if extra_env else None
+    return True
 
-    print(f"  Dumping to {dump_file} ...")
-    try:
-        with open(dump_file, "wb") as outf:
-            result = subprocess.run(
-                cmd, shell=True, stdout=outf, stderr=subprocess.PIPE,
-                env=dump_env, timeout=7200,  # 2 hour timeout
-            )
-        if result.returncode != 0:
-            print(f"  ERROR: Dump failed (exit {result.returncode})")
-            print(f"  stderr: {result.stderr.decode().strip()}")
-            _cleanup(dump_file)
-            return False
-    except subprocess.TimeoutExpired:
-        print("  ERROR: Dump timed out after 2 hours")
-        _cleanup(dump_file)
-        return False
 
-    file_size = os.path.getsize(dump_file)
-    print(f"  Dump complete. Size: {file_size / (1024*1024):.1f} MB")
+def run_job(job: dict) -> bool:
+    """Execute a single backup job (dump streamed to Drive). Returns True on success.
 
-    if file_size == 0:
-        print("  ERROR: Dump file is empty, skipping upload")
-        _cleanup(dump_file)
-        return False
+    The job must have been through _prepare_job first.
+    """
+    name = job["name"]
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
+    file_name = f"{name}_{timestamp}{job['file_ext']}"
+
+    _log(name, f"Starting backup at {timestamp}")
 
-    # --- Upload ---
     folder_id = os.environ.get(job["drive_folder_id_env"])
     if not folder_id:
-        print(f"  ERROR: Missing env var {job['drive_folder_id_env']}")
-        _cleanup(dump_file)
+        _log(name, f"ERROR: Missing env var {job['drive_folder_id_env']}")
+        return False
+
+    try:
+        _log(name, "Authenticating with Google Drive ...")
+        service = _drive_service(job["token_path"])
+    except Exception as e:
+        _log(name, f"ERROR: Authentication failed: {e}")
         return False
 
+    # --- Dump, piped straight into the upload ---
+    _log(name, f"Streaming dump to Drive folder {folder_id} as {file_name} ...")
+    proc = subprocess.Popen(
+        job["_cmd"], shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=job["_env"],
+        start_new_session=True,  # own process group, so the whole pipeline can be killed
+    )
+
+    # Log stderr as it arrives; also keeps a chatty dump from filling the pipe
+    def _log_stderr():
+        for line in proc.stderr:
+            _log(name, f"dump: {line.decode(errors='replace').rstrip()}")
+
+    stderr_reader = threading.Thread(target=_log_stderr)
+    stderr_reader.start()
+
+    def _on_timeout():
+        _log(name, f"ERROR: Dump timed out after {DUMP_TIMEOUT // 3600} hours")
+        _kill_dump(proc)
+
+    watchdog = threading.Timer(DUMP_TIMEOUT, _on_timeout)
+    watchdog.start()
+
+    file_id = None
     try:
-        print(f"  Authenticating with Google Drive ...")
-        creds = authenticate(job["token_path"])
-        print(f"  Uploading to Drive folder {folder_id} ...")
-        upload_to_drive(dump_file, folder_id, creds)
+        if not proc.stdout.peek(1):
+            _log(name, "ERROR: Dump produced no output, skipping upload")
+        else:
+            file_id = upload_to_drive(
+                name, proc.stdout, file_name, folder_id, service, mimetype=job["mimetype"],
+            )
     except Exception as e:
-        print(f"  ERROR: Upload failed: {e}")
-        _cleanup(dump_file)
+        _log(name, f"ERROR: Upload failed: {e}")
+        _kill_dump(proc)
+        return False
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+        watchdog.cancel()
+        stderr_reader.join()
+
+    if returncode != 0:
+        _log(name, f"ERROR: Dump failed (exit {returncode})")
+        if file_id:
+            _discard_upload(name, file_id, service)
+        return False
+
+    if not file_id:
         return False
 
-    # --- Cleanup ---
-    _cleanup(dump_file)
-    print(f"  Backup complete for {name}")
+    _log(name, "Backup complete")
     return True
 
 
-def _cleanup(path: str):
-    """Remove a file if it exists."""
+def _kill_dump(proc):
+    """Kill every process in the dump pipeline, not just the /bin/sh wrapper."""
     try:
-        if os.path.exists(path):
-            os.remove(path)
-            print(f"  Cleaned up {path}")
-    except OSError as e:
-        print(f"  Warning: Could not remove {path}: {e}")
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass  # pipeline already exited
+
+
+def _discard_upload(name: str, file_id: str, service):
+    """Remove a partial upload left behind by a failed dump."""
+    try:
+        delete_from_drive(file_id, service)
+        _log(name, f"Deleted incomplete upload {file_id}")
+    except Exception as e:
+        _log(name, f"Warning: Could not delete incomplete upload {file_id}: {e}")
+
+
+_print_lock = threading.Lock()
+
+
+def _log(name: str, message: str):
+    """Print a message prefixed with the job name.
+
+    Jobs run in parallel threads, so the lock keeps each line intact.
+    """
+    with _print_lock:
+        print(f"  [{name}] {message}", flush=True)
 
 
 # ---------------------------------------------------------------------------
@@ -227,20 +416,30 @@ def main():
     print(f"{'#'*60}")
 
     results = {}
+    ready = []
     for job in jobs_to_run:
-        try:
-            results[job["name"]] = run_job(job)
-        except Exception as e:
-            print(f"  UNEXPECTED ERROR in {job['name']}: {e}")
+        if _prepare_job(job):
+            ready.append(job)
+        else:
             results[job["name"]] = False
 
+    with ThreadPoolExecutor(max_workers=max(1, len(ready))) as executor:
+        futures = {executor.submit(run_job, job): job["name"] for job in ready}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                _log(name, f"UNEXPECTED ERROR: {e}")
+                results[name] = False
+
     # --- Summary ---
     elapsed = time.time() - start
     print(f"\n{'='*60}")
     print(f"Backup summary ({elapsed:.0f}s elapsed):")
-    for name, ok in results.items():
-        status = "OK" if ok else "FAILED"
-        print(f"  {name}: {status}")
+    for job in jobs_to_run:
+        status = "OK" if results[job["name"]] else "FAILED"
+        print(f"  {job['name']}: {status}")
     print(f"{'='*60}\n")
 
     if not all(results.values()):
@@ -41,27 +41,39 @@ Config format (tasks.json):
 ]
 """
 
+import functools
+import heapq
 import json
 import os
 import sys
 import time
 import logging
 import subprocess
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from zoneinfo import ZoneInfo
 
-import pytz
 import requests
 from croniter import croniter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional speedup; falls back to stdlib json
+    orjson = None
 
 # Configure logging - log file path configurable for testing outside Docker
 LOG_FILE = os.environ.get('TASK_SCHEDULER_LOG', '/var/log/task-scheduler.log')
 
 handlers = [logging.StreamHandler(sys.stdout)]
-try:
-    handlers.append(logging.FileHandler(LOG_FILE))
-except (PermissionError, FileNotFoundError):
-    pass  # Skip file handler when running outside Docker (e.g. tests)
+# Skip file handler when running outside Docker (e.g. tests). delay=True opens
+# the file on first write rather than at import.
+if os.access(os.path.dirname(LOG_FILE) or '.', os.W_OK):
+    handlers.append(RotatingFileHandler(LOG_FILE, maxBytes=10 * 1024 * 1024, backupCount=5, delay=True))
 
 logging.basicConfig(
     level=logging.INFO,
@@ -70,11 +82,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-PACIFIC_TZ = pytz.timezone('America/Los_Angeles')
+PACIFIC_TZ = ZoneInfo('America/Los_Angeles')
 
 # Default config path; override with TASK_CONFIG env var
 DEFAULT_CONFIG_PATH = '/app/tasks.json'
 
+# Config mtime and tasks from the last successful maybe_reload()
+_CFG_MTIME = None
+_CFG_TASKS = None
+
 # Legacy format required fields
 LEGACY_REQUIRED_FIELDS = {"name", "hour", "minute", "days", "command"}
 VALID_DAYS = {"daily", "weekdays"}
@@ -82,6 +98,31 @@ VALID_DAYS = {"daily", "weekdays"}
 # Valid task types
 VALID_TASK_TYPES = {"command", "http"}
 
+# Shared HTTP session so repeated HTTP tasks reuse pooled connections.
+# Retries cover connection failures and 5xx responses on idempotent methods.
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False,  # hand the last response back for normal status handling
+    ),
+)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+# Longest the main loop sleeps between checks, so clock jumps are noticed
+MAX_SLEEP_SECONDS = 60
+
+# Maximum number of tasks running at the same time
+SCHED_CONCURRENCY = int(os.environ.get('SCHED_CONCURRENCY', 4))
+
+# last_runs keeps at most this many entries per registered task
+LAST_RUNS_PER_TASK = 4
+
 
 def load_tasks(config_path=None):
     """Load tasks from a JSON config file.
@@ -103,8 +144,9 @@ def load_tasks(config_path=None):
     if not path.exists():
         raise FileNotFoundError(f"Task config not found: {path}")
 
-    with open(path) as f:
-        tasks = json.load(f)
+    with open(path, 'rb') as f:
+        data = f.read()
+    tasks = orjson.loads(data) if orjson else json.loads(data)
 
     if not isinstance(tasks, list):
         raise ValueError(f"Task config must be a JSON array, got {type(tasks).__name__}")
@@ -115,6 +157,40 @@ def load_tasks(config_path=None):
     return tasks
 
 
+def maybe_reload(config_path=None):
+    """Return the current tasks, re-loading the config only when its mtime changes.
+
+    A single os.stat per call keeps this cheap enough for every loop
+    iteration. If a changed config fails to load, the previous tasks are
+    kept (the first load still raises).
+
+    Args:
+        config_path: Same as load_tasks().
+
+    Returns:
+        List of validated task dicts.
+    """
+    global _CFG_MTIME, _CFG_TASKS
+    path = config_path or os.environ.get('TASK_CONFIG', DEFAULT_CONFIG_PATH)
+
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if mtime == _CFG_MTIME:
+            return _CFG_TASKS
+        tasks = load_tasks(path)
+    except Exception as e:
+        # validate_task can also raise TypeError/AttributeError on wrongly
+        # typed fields; none of those should stop the already-running tasks
+        if _CFG_TASKS is None:
+            raise
+        logger.error(f"Failed to reload {path}, keeping previous tasks: {e}")
+        return _CFG_TASKS
+
+    _CFG_MTIME = mtime
+    _CFG_TASKS = tasks
+    return tasks
+
+
 def _is_cron_task(task):
     """Check if a task uses cron scheduling (vs legacy format)."""
     return "schedule" in task
@@ -159,6 +235,43 @@ def _validate_cron_task(task):
     if not croniter.is_valid(schedule):
         raise ValueError(f"Task '{task['name']}' has invalid cron expression: {schedule}")
 
+    # Parse once up front so the scheduler loop only hits the cache
+    _compile_cron(schedule)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_cron(schedule):
+    """Compile a cron expression into a matcher for wall-clock minutes.
+
+    Returns a function taking a datetime and returning True if its minute
+    matches the expression, or None for expressions the matcher doesn't
+    handle (seconds/year fields, 'L', '#'), which fall back to croniter.
+    """
+    expanded, nth_weekday = croniter.expand(schedule)
+    if len(expanded) != 5 or nth_weekday or "l" in expanded[2]:
+        return None
+
+    minutes, hours, days, months, weekdays = (
+        None if field == ["*"] else frozenset(field) for field in expanded
+    )
+
+    def match(dt):
+        if minutes is not None and dt.minute not in minutes:
+            return False
+        if hours is not None and dt.hour not in hours:
+            return False
+        if months is not None and dt.month not in months:
+            return False
+        day_ok = days is None or dt.day in days
+        # cron counts weekdays from Sunday = 0, Python from Monday = 0
+        weekday_ok = weekdays is None or (dt.weekday() + 1) % 7 in weekdays
+        # Standard cron: when both day fields are restricted, either may match
+        if days is not None and weekdays is not None:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    return match
+
 
 def _validate_legacy_task(task):
     """Validate a task with legacy hour/minute/days format."""
@@ -192,6 +305,26 @@ def _validate_http_task(task):
     if method not in {"GET", "POST", "PUT", "DELETE", "PATCH"}:
         raise ValueError(f"Task '{task['name']}' has invalid HTTP method: {method}")
 
+    expected_status = http.get("expected_status", [200])
+    if not isinstance(expected_status, list) or not all(isinstance(s, int) for s in expected_status):
+        raise ValueError(f"Task '{task['name']}' http expected_status must be a list of ints")
+
+    # Normalize once so each run can use the request spec as-is
+    task["_http_prepared"] = _prepare_http(task)
+
+
+def _prepare_http(task):
+    """Normalize a task's http config into the values run_http_task needs."""
+    http = task["http"]
+    body = http.get("body", None)
+    return {
+        "method": http.get("method", "GET").upper(),
+        "url": http["url"],
+        "headers": http.get("headers", {}),
+        "json": body if body else None,
+        "expected_status": frozenset(http.get("expected_status", [200])),
+    }
+
 
 def should_task_run(task, now, last_runs):
     """Check if a task should run at the given time.
@@ -212,19 +345,31 @@ def should_task_run(task, now, last_runs):
         return _should_run_legacy(task, now, last_runs)
 
 
+def _after_dst_shift(now):
+    """Return True if now falls in the first minute after a UTC offset change."""
+    minute_ago = (now.astimezone(timezone.utc) - timedelta(minutes=1)).astimezone(now.tzinfo)
+    return minute_ago.utcoffset() != now.utcoffset()
+
+
 def _should_run_cron(task, now, last_runs):
     """Check if a cron-scheduled task should run now.
 
-    Uses croniter to check if the current minute matches the cron expression.
+    Checks the current minute against the compiled cron expression, falling
+    back to croniter for expressions _compile_cron doesn't handle and for
+    the first minute after a DST shift.
     Dedup key uses minute-level precision (YYYY-MM-DD HH:MM).
     """
-    cron = croniter(task["schedule"], now)
-    prev_match = cron.get_prev(datetime)
-
-    # Check if prev_match falls within the current minute
-    diff = (now - prev_match).total_seconds()
-    if diff >= 60:
-        return False
+    match = _compile_cron(task["schedule"])
+    # Wall-clock times skipped by spring-forward (e.g. 02:00) are due in the
+    # first minute after the gap; only croniter accounts for that
+    if match is not None and not _after_dst_shift(now):
+        if not match(now):
+            return False
+    else:
+        prev_match = croniter(task["schedule"], now).get_prev(datetime)
+        # Check if prev_match falls within the current minute
+        if (now - prev_match).total_seconds() >= 60:
+            return False
 
     # Dedup: prevent running twice in the same minute
     run_key = now.strftime("%Y-%m-%d %H:%M")
@@ -253,6 +398,11 @@ def _should_run_legacy(task, now, last_runs):
     return True
 
 
+def _prefix_lines(name, output):
+    """Prefix each line of task output with the task name, as one log message."""
+    return "\n".join(f"[{name}] {line}" for line in output.strip().split('\n'))
+
+
 def run_task(task):
     """Execute a command-type scheduled task.
 
@@ -275,13 +425,11 @@ def run_task(task):
         if result.returncode == 0:
             logger.info(f"[{task['name']}] Completed successfully")
             if result.stdout:
-                for line in result.stdout.strip().split('\n'):
-                    logger.info(f"[{task['name']}] {line}")
+                logger.info(_prefix_lines(task['name'], result.stdout))
         else:
             logger.error(f"[{task['name']}] Failed with exit code {result.returncode}")
             if result.stderr:
-                for line in result.stderr.strip().split('\n'):
-                    logger.error(f"[{task['name']}] {line}")
+                logger.error(_prefix_lines(task['name'], result.stderr))
 
         return result.returncode
 
@@ -302,22 +450,19 @@ def run_http_task(task):
     Returns:
         0 on success (status in expected_status list), 1 on failure.
     """
-    http = task["http"]
-    method = http.get("method", "GET").upper()
-    url = http["url"]
-    headers = http.get("headers", {})
-    body = http.get("body", None)
-    expected_status = http.get("expected_status", [200])
+    # Tasks from load_tasks() are prepared during validation
+    http = task.get("_http_prepared") or _prepare_http(task)
+    expected_status = http["expected_status"]
     timeout = task.get("timeout", 120)
 
-    logger.info(f"[{task['name']}] HTTP {method} {url}")
+    logger.info(f"[{task['name']}] HTTP {http['method']} {http['url']}")
 
     try:
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=headers,
-            json=body if body else None,
+        response = _SESSION.request(
+            method=http["method"],
+            url=http["url"],
+            headers=http["headers"],
+            json=http["json"],
             timeout=timeout,
         )
 
@@ -328,7 +473,7 @@ def run_http_task(task):
                 logger.info(f"[{task['name']}] Response: {preview}")
             return 0
         else:
-            logger.error(f"[{task['name']}] HTTP {response.status_code} (expected {expected_status})")
+            logger.error(f"[{task['name']}] HTTP {response.status_code} (expected {sorted(expected_status)})")
             preview = response.text[:500] if response.text else ""
             if preview:
                 logger.error(f"[{task['name']}] Response: {preview}")
@@ -356,6 +501,18 @@ def _get_dedup_key(task, now):
         return now.strftime("%Y-%m-%d %H")
 
 
+def _record_run(last_runs, task, now, max_entries):
+    """Store a task's dedup key, evicting the least recently run entries.
+
+    last_runs is an OrderedDict kept in run order, so names that are no longer
+    scheduled (e.g. renamed tasks) age out instead of accumulating forever.
+    """
+    last_runs[task["name"]] = _get_dedup_key(task, now)
+    last_runs.move_to_end(task["name"])
+    while len(last_runs) > max_entries:
+        last_runs.popitem(last=False)
+
+
 def _format_schedule(task):
     """Format a task's schedule for logging."""
     if _is_cron_task(task):
@@ -365,44 +522,133 @@ def _format_schedule(task):
         return f"{task['hour']:02d}:{task['minute']:02d} Pacific, {days_label}"
 
 
-def main():
-    """Main scheduler loop."""
-    logger.info("Task Scheduler started")
+def _cron_expression(task):
+    """Return a task's cron expression, synthesizing one for legacy tasks."""
+    if _is_cron_task(task):
+        return task["schedule"]
+    dow = "1-5" if task["days"] == "weekdays" else "*"
+    return f"{task['minute']} {task['hour']} * * {dow}"
+
+
+def _next_fire(cron, now):
+    """Advance cron past now and return its next fire as a UTC timestamp.
+
+    Pacific datetimes compare by wall clock and ignore fold, so the repeated
+    01:xx hour on the fall-back day would look already due; timestamps don't.
+    """
+    cron.set_current(now, force=True)
+    fire = cron.get_next(float)
+    while fire <= now.timestamp():
+        fire = cron.get_next(float)
+    return fire
+
+
+def _build_schedule(tasks, now):
+    """Build a min-heap of (next_fire_ts, index, croniter) entries, one per task."""
+    schedule = []
+    for i, task in enumerate(tasks):
+        cron = croniter(_cron_expression(task), now)
+        heapq.heappush(schedule, (_next_fire(cron, now), i, cron))
+    return schedule
+
 
-    tasks = load_tasks()
+def _run_due(schedule, tasks, now, last_runs, in_flight, executor):
+    """Dispatch every schedule entry due at or before now, then re-arm it.
 
+    A task whose previous run is still in flight is skipped (and not
+    recorded) rather than started a second time.
+    """
+    now_ts = now.timestamp()
+    while schedule and schedule[0][0] <= now_ts:
+        _, i, cron = heapq.heappop(schedule)
+        task = tasks[i]
+        if should_task_run(task, now, last_runs):
+            running = in_flight.get(task["name"])
+            if running is not None and not running.done():
+                logger.warning(f"Skipping '{task['name']}': previous run still in progress")
+            else:
+                logger.info(f"Triggering '{task['name']}' at {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+
+                task_type = task.get("type", "command")
+                runner = run_http_task if task_type == "http" else run_task
+                in_flight[task["name"]] = executor.submit(runner, task)
+
+                _record_run(last_runs, task, now, LAST_RUNS_PER_TASK * len(tasks))
+
+        heapq.heappush(schedule, (_next_fire(cron, now), i, cron))
+
+
+def _prune_in_flight(in_flight, tasks):
+    """Drop finished runs and tasks no longer configured from in_flight.
+
+    Called on config reload so renamed or removed tasks don't accumulate.
+    """
+    names = {task["name"] for task in tasks}
+    for name, future in list(in_flight.items()):
+        if future.done() or name not in names:
+            del in_flight[name]
+
+
+def _log_tasks(tasks):
+    """Log the registered tasks and their schedules."""
     logger.info(f"Loaded {len(tasks)} task(s):")
     for task in tasks:
         task_type = task.get("type", "command")
         desc = f" — {task['description']}" if task.get("description") else ""
         logger.info(f"  - {task['name']}: {_format_schedule(task)} [{task_type}]{desc}")
 
-    last_runs = {}
 
-    while True:
-        try:
-            now = datetime.now(PACIFIC_TZ)
+def main():
+    """Main scheduler loop.
+
+    Sleeps until the earliest upcoming fire time (capped at MAX_SLEEP_SECONDS)
+    instead of polling on a fixed interval. The task config is re-read
+    whenever its mtime changes.
+    """
+    logger.info("Task Scheduler started")
 
-            for task in tasks:
-                if should_task_run(task, now, last_runs):
-                    logger.info(f"Triggering '{task['name']}' at {now.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+    # The first load happens outside the loop so a missing or invalid config
+    # at startup exits the process instead of being retried forever
+    maybe_reload()
 
-                    task_type = task.get("type", "command")
-                    if task_type == "http":
-                        run_http_task(task)
-                    else:
-                        run_task(task)
+    tasks = None
+    last_runs = OrderedDict()
+    # Tasks run in worker threads so a slow task doesn't delay other fires
+    executor = ThreadPoolExecutor(max_workers=SCHED_CONCURRENCY)
+    in_flight = {}  # task name -> Future of its latest run
+    schedule = []
+    last_status_hour = None
 
-                    last_runs[task["name"]] = _get_dedup_key(task, now)
+    while True:
+        try:
+            now = datetime.now(PACIFIC_TZ)
 
-            # Log status at the top of every hour
-            if now.minute == 0 and now.second < 30:
+            loaded = maybe_reload()
+            if loaded is not tasks:
+                tasks = loaded
+                _log_tasks(tasks)
+                _prune_in_flight(in_flight, tasks)
+                # Start from the top of the current minute so a fire due right
+                # now isn't skipped when the config loads mid-minute
+                minute_start = now.replace(second=0, microsecond=0) - timedelta(microseconds=1)
+                schedule = _build_schedule(tasks, minute_start)
+
+            _run_due(schedule, tasks, now, last_runs, in_flight, executor)
+
+            # Log status once per hour
+            status_hour = now.strftime('%Y-%m-%d %H')
+            if status_hour != last_status_hour:
+                last_status_hour = status_hour
                 logger.info(f"Status: {now.strftime('%Y-%m-%d %H:%M %Z')} - {len(tasks)} tasks registered")
 
-            time.sleep(30)
+            wait = MAX_SLEEP_SECONDS
+            if schedule:
+                wait = schedule[0][0] - time.time()
+            time.sleep(min(MAX_SLEEP_SECONDS, max(0, wait)))
 
         except KeyboardInterrupt:
             logger.info("Scheduler stopped by user")
+            executor.shutdown(wait=False, cancel_futures=True)
             break
         except Exception as e:
             logger.error(f"Scheduler error: {e}", exc_info=True)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Tests for task-scheduler/backup.py"""
+
+import io
+import json
+import re
+import subprocess
+import time
+
+import httplib2
+import pytest
+from google.oauth2.credentials import Credentials
+from googleapiclient.http import HttpRequest
+
+import backup
+from backup import _PipeUpload, _kill_dump
+
+
+class _FakeResumableHttp:
+    """Minimal Drive resumable-upload endpoint.
+
+    Records every PUT's Content-Range. drop_puts lists 1-based PUT numbers
+    that fail with ConnectionResetError before the server sees the body.
+    """
+
+    def __init__(self, drop_puts=()):
+        self.data = b""
+        self.ranges = []
+        self.drop_puts = set(drop_puts)
+        self.puts = 0
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        if method == "POST":
+            return httplib2.Response({"status": "200", "location": "http://fake/upload"}), b""
+
+        content_range = headers.get("Content-Range", "")
+        self.ranges.append(content_range)
+        if content_range.startswith("bytes */"):
+            return self._incomplete()
+
+        self.puts += 1
+        if self.puts in self.drop_puts:
+            raise ConnectionResetError("connection reset by peer")
+
+        start, end, total = re.fullmatch(r"bytes (\d+)-(\d+)/(\S+)", content_range).groups()
+        assert int(start) == len(self.data)
+        assert len(body) == int(end) - int(start) + 1
+        self.data += body
+        if total == "*":
+            return self._incomplete()
+        assert int(total) == len(self.data)
+        return httplib2.Response({"status": "200"}), b'{"id": "file-id"}'
+
+    def _incomplete(self):
+        headers = {"status": "308"}
+        if self.data:
+            headers["range"] = f"bytes=0-{len(self.data) - 1}"
+        return httplib2.Response(headers), b""
+
+
+def _upload(payload, http, chunksize=10):
+    """Stream payload through _PipeUpload, resuming after dropped connections."""
+    media = _PipeUpload(io.BufferedReader(io.BytesIO(payload)), "application/gzip", chunksize=chunksize)
+    request = HttpRequest(
+        http, lambda resp, content: json.loads(content), "http://fake/start",
+        method="POST", body="{}", headers={"content-type": "application/json"},
+        resumable=media,
+    )
+    response = None
+    while response is None:
+        try:
+            _, response = request.next_chunk()
+        except ConnectionResetError:
+            continue
+    return response
+
+
+class TestPipeUpload:
+    pytestmark = pytest.mark.unit_upload
+
+    @pytest.mark.parametrize("size,expected_ranges", [
+        pytest.param(20, ["bytes 0-9/*", "bytes 10-19/20"], id="exact_chunk_boundary"),
+        pytest.param(7, ["bytes 0-6/7"], id="shorter_than_one_chunk"),
+        pytest.param(25, ["bytes 0-9/*", "bytes 10-19/*", "bytes 20-24/25"], id="short_final_chunk"),
+    ])
+    def test_stream_is_finalized(self, size, expected_ranges):
+        payload = bytes(range(size))
+        http = _FakeResumableHttp()
+        assert _upload(payload, http) == {"id": "file-id"}
+        assert http.data == payload
+        # The last PUT carries the total size; no empty, unterminated PUT follows
+        assert http.ranges == expected_ranges
+
+    def test_resumes_after_connection_reset(self):
+        payload = bytes(range(25))
+        http = _FakeResumableHttp(drop_puts={2})
+        assert _upload(payload, http) == {"id": "file-id"}
+        assert http.data == payload
+        # The dropped chunk is re-sent from the buffer after a status query
+        assert http.ranges == [
+            "bytes 0-9/*", "bytes 10-19/*", "bytes */*", "bytes 10-19/*", "bytes 20-24/25",
+        ]
+
+
+class TestKillDump:
+    pytestmark = pytest.mark.unit_proc
+
+    def test_kills_whole_pipeline(self):
+        proc = subprocess.Popen(
+            "sleep 30 | cat", shell=True, stdout=subprocess.PIPE, start_new_session=True,
+        )
+        started = time.monotonic()
+        _kill_dump(proc)
+        # stdout only reaches EOF once every writer in the pipeline is gone
+        assert proc.stdout.read() == b""
+        assert proc.wait() != 0
+        assert time.monotonic() - started < 5
+        proc.stdout.close()
+
+    def test_already_exited_pipeline_is_ignored(self):
+        proc = subprocess.Popen("true", shell=True, start_new_session=True)
+        proc.wait()
+        _kill_dump(proc)  # Should not raise
+
+
+class TestDriveService:
+    pytestmark = pytest.mark.unit_upload
+
+    def test_jobs_share_credentials_but_not_connections(self, monkeypatch):
+        loads = []
+
+        def fake_authenticate(token_path):
+            loads.append(token_path)
+            return Credentials(token="token")
+
+        monkeypatch.setattr(backup, "authenticate", fake_authenticate)
+        backup._credentials.cache_clear()
+        try:
+            first = backup._drive_service("/tokens/shared.json")
+            second = backup._drive_service("/tokens/shared.json")
+        finally:
+            backup._credentials.cache_clear()
+
+        assert loads == ["/tokens/shared.json"]
+        assert first._http is not second._http
+        assert first._http.credentials is second._http.credentials
@@ -1,86 +1,109 @@
 #!/usr/bin/env python3
 """Tests for task-scheduler/scheduler.py"""
 
+import functools
+import itertools
 import json
+import os
 import subprocess
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import MagicMock
 
 import pytest
-import pytz
+from croniter import croniter
+from requests import ConnectionError as _RequestsConnError, Timeout as _RequestsTimeout
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from scheduler import (
     should_task_run,
     run_task,
     run_http_task,
     load_tasks,
+    maybe_reload,
+    main,
     validate_task,
     _should_run_cron,
+    _compile_cron,
     _should_run_legacy,
     _is_cron_task,
     _get_dedup_key,
+    _record_run,
     _format_schedule,
+    _cron_expression,
+    _build_schedule,
+    _run_due,
+    _prune_in_flight,
     PACIFIC_TZ,
 )
 
 
+_BUNDLED_TASKS = Path(__file__).parent / "tasks.json"
+
+
 # --- Fixtures ---
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def sample_task():
-    """Legacy format task for backward compat testing."""
-    return {
+    """Legacy format task for backward compat testing (read-only, shared)."""
+    return MappingProxyType({
         "name": "test_task",
         "hour": 1,
         "minute": 0,
         "days": "daily",
         "command": ["echo", "hello"],
         "timeout": 10,
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def weekday_task():
-    """Legacy format weekday-only task."""
-    return {
+    """Legacy format weekday-only task (read-only, shared)."""
+    return MappingProxyType({
         "name": "weekday_only",
         "hour": 9,
         "minute": 30,
         "days": "weekdays",
         "command": ["echo", "weekday"],
         "timeout": 10,
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def cron_task():
-    """Cron-scheduled command task."""
-    return {
+    """Cron-scheduled command task (read-only, shared)."""
+    return MappingProxyType({
         "name": "cron_task",
         "schedule": "0 1 * * *",
         "type": "command",
         "command": ["echo", "cron"],
         "timeout": 10,
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def cron_weekday_task():
-    """Cron-scheduled task that runs every 10 min, 6am-1pm, weekdays."""
-    return {
+    """Cron-scheduled task that runs every 10 min, 6am-1pm, weekdays (read-only, shared)."""
+    return MappingProxyType({
         "name": "cron_weekday",
         "schedule": "*/10 6-13 * * 1-5",
         "type": "command",
         "command": ["echo", "market"],
         "timeout": 10,
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def http_task():
-    """HTTP-type task with cron schedule."""
-    return {
+    """HTTP-type task with cron schedule (read-only, shared)."""
+    return MappingProxyType({
         "name": "http_task",
         "schedule": "*/10 6-13 * * 1-5",
         "type": "http",
@@ -92,15 +115,21 @@ def http_task():
             "expected_status": [200],
         },
         "timeout": 120,
-    }
+    })
 
 
-@pytest.fixture
-def tasks_json(tmp_path):
-    """Write a tasks.json to a temp dir and return the path."""
+@pytest.fixture(scope="session")
+def tasks_json(tmp_path_factory):
+    """Write a tasks config to a shared temp dir and return its path.
+
+    Each call gets a uniquely named file, so one directory serves the session.
+    """
+    tmpdir = tmp_path_factory.mktemp("tasks")
+    counter = itertools.count()
+
     def _write(tasks):
-        path = tmp_path / "tasks.json"
-        path.write_text(json.dumps(tasks))
+        path = tmpdir / f"tasks_{next(counter)}.json"
+        path.write_bytes(orjson.dumps(tasks) if orjson else json.dumps(tasks).encode())
         return str(path)
     return _write
 
@@ -112,13 +141,21 @@ def make_pacific_time(year=2026, month=2, day=19, hour=1, minute=0, second=0):
     Feb 21, 2026 = Saturday
     Feb 22, 2026 = Sunday
     """
-    dt = PACIFIC_TZ.localize(datetime(year, month, day, hour, minute, second))
-    return dt
+    return _pacific_time(year, month, day, hour, minute, second)
+
+
+@functools.lru_cache(maxsize=None)
+def _pacific_time(year, month, day, hour, minute, second):
+    # Keyed on the full positional tuple so keyword/default spellings of the
+    # same moment share an entry; aware datetimes are immutable, so sharing is safe
+    return datetime(year, month, day, hour, minute, second, tzinfo=PACIFIC_TZ)
 
 
 # --- _is_cron_task tests ---
 
 class TestIsCronTask:
+    pytestmark = pytest.mark.unit_validate
+
     def test_cron_task(self, cron_task):
         assert _is_cron_task(cron_task) is True
 
@@ -129,160 +166,163 @@ class TestIsCronTask:
 # --- Legacy should_task_run tests (backward compatibility) ---
 
 class TestShouldTaskRunLegacy:
-    def test_runs_at_correct_time(self, sample_task):
-        now = make_pacific_time(hour=1, minute=0)
-        assert should_task_run(sample_task, now, {}) is True
-
-    def test_does_not_run_at_wrong_hour(self, sample_task):
-        now = make_pacific_time(hour=2, minute=0)
-        assert should_task_run(sample_task, now, {}) is False
+    pytestmark = pytest.mark.unit_time
+
+    # Feb 19, 2026 is a Thursday; Feb 21/22 are Saturday/Sunday
+    CASES = [
+        pytest.param("sample_task", dict(hour=1, minute=0), {}, True,
+                     id="runs_at_correct_time"),
+        pytest.param("sample_task", dict(hour=2, minute=0), {}, False,
+                     id="does_not_run_at_wrong_hour"),
+        pytest.param("sample_task", dict(hour=1, minute=5), {}, False,
+                     id="does_not_run_at_wrong_minute"),
+        pytest.param("sample_task", dict(hour=1, minute=0), {"test_task": "2026-02-19 01"}, False,
+                     id="prevents_duplicate_run_same_hour"),
+        pytest.param("sample_task", dict(hour=1, minute=0), {"test_task": "2026-02-19 00"}, True,
+                     id="allows_run_different_hour"),
+        pytest.param("sample_task", dict(hour=1, minute=0), {"test_task": "2026-02-18 01"}, True,
+                     id="allows_run_different_day"),
+        pytest.param("sample_task", dict(day=21, hour=1, minute=0), {}, True,
+                     id="daily_runs_on_weekends"),
+        pytest.param("weekday_task", dict(hour=9, minute=30), {}, True,
+                     id="weekday_task_runs_on_weekday"),
+        pytest.param("weekday_task", dict(day=21, hour=9, minute=30), {}, False,
+                     id="weekday_task_skips_saturday"),
+        pytest.param("weekday_task", dict(day=22, hour=9, minute=30), {}, False,
+                     id="weekday_task_skips_sunday"),
+        pytest.param("sample_task", dict(hour=1, minute=0), {"other_task": "2026-02-19 01"}, True,
+                     id="unrelated_task_last_run_does_not_affect"),
+    ]
+
+    @pytest.mark.parametrize("fixture,when,last_runs,expected", CASES)
+    def test_should_task_run(self, request, fixture, when, last_runs, expected):
+        task = request.getfixturevalue(fixture)
+        assert should_task_run(task, make_pacific_time(**when), last_runs) is expected
 
-    def test_does_not_run_at_wrong_minute(self, sample_task):
-        now = make_pacific_time(hour=1, minute=5)
-        assert should_task_run(sample_task, now, {}) is False
 
-    def test_prevents_duplicate_run_same_hour(self, sample_task):
-        now = make_pacific_time(hour=1, minute=0)
-        last_runs = {"test_task": "2026-02-19 01"}
-        assert should_task_run(sample_task, now, last_runs) is False
+# --- Cron should_task_run tests ---
 
-    def test_allows_run_different_hour(self, sample_task):
-        now = make_pacific_time(hour=1, minute=0)
-        last_runs = {"test_task": "2026-02-19 00"}
-        assert should_task_run(sample_task, now, last_runs) is True
+class TestShouldTaskRunCron:
+    pytestmark = pytest.mark.unit_time
+
+    # Feb 19, 2026 is a Thursday; Feb 21/22 are Saturday/Sunday
+    CASES = [
+        pytest.param("cron_task", dict(hour=1, minute=0, second=15), {}, True,
+                     id="runs_at_matching_time"),
+        pytest.param("cron_task", dict(hour=2, minute=0), {}, False,
+                     id="does_not_run_at_non_matching_time"),
+        pytest.param("cron_task", dict(hour=1, minute=30), {}, False,
+                     id="does_not_run_at_wrong_minute"),
+        pytest.param("cron_task", dict(hour=1, minute=0, second=15), {"cron_task": "2026-02-19 01:00"}, False,
+                     id="prevents_duplicate_run_same_minute"),
+        pytest.param("cron_task", dict(hour=1, minute=0, second=15), {"cron_task": "2026-02-19 00:50"}, True,
+                     id="allows_run_different_minute"),
+        pytest.param("cron_weekday_task", dict(hour=6, minute=0, second=10), {}, True,
+                     id="every_10_min_runs_at_6_00"),
+        pytest.param("cron_weekday_task", dict(hour=6, minute=10, second=10), {}, True,
+                     id="every_10_min_runs_at_6_10"),
+        pytest.param("cron_weekday_task", dict(hour=6, minute=20, second=5), {}, True,
+                     id="every_10_min_runs_at_6_20"),
+        pytest.param("cron_weekday_task", dict(hour=6, minute=5), {}, False,
+                     id="every_10_min_skips_6_05"),
+        pytest.param("cron_weekday_task", dict(hour=5, minute=0, second=10), {}, False,
+                     id="every_10_min_skips_before_6am"),
+        pytest.param("cron_weekday_task", dict(hour=14, minute=0, second=10), {}, False,
+                     id="every_10_min_skips_after_1pm"),
+        pytest.param("cron_weekday_task", dict(hour=13, minute=50, second=10), {}, True,
+                     id="every_10_min_runs_at_13_50"),
+        pytest.param("cron_weekday_task", dict(day=21, hour=6, minute=0, second=10), {}, False,
+                     id="weekday_cron_skips_saturday"),
+        pytest.param("cron_weekday_task", dict(day=22, hour=6, minute=0, second=10), {}, False,
+                     id="weekday_cron_skips_sunday"),
+        pytest.param("cron_task", dict(day=21, hour=1, minute=0, second=10), {}, True,
+                     id="daily_cron_runs_on_weekend"),
+    ]
+
+    @pytest.mark.parametrize("fixture,when,last_runs,expected", CASES)
+    def test_should_task_run(self, request, fixture, when, last_runs, expected):
+        task = request.getfixturevalue(fixture)
+        assert should_task_run(task, make_pacific_time(**when), last_runs) is expected
+
+    def test_daily_cron_runs_on_dst_transition_days(self, cron_task):
+        """tzinfo= resolves 01:00 to PST on spring-forward and PDT on fall-back."""
+        spring = make_pacific_time(month=3, day=8, hour=1, minute=0, second=10)
+        fall = make_pacific_time(month=11, day=1, hour=1, minute=0, second=10)
+        assert spring.utcoffset() == timedelta(hours=-8)
+        assert fall.utcoffset() == timedelta(hours=-7)
+        assert should_task_run(cron_task, spring, {}) is True
+        assert should_task_run(cron_task, fall, {}) is True
+
+
+# --- Compiled cron matcher tests ---
+
+class TestCompileCron:
+    pytestmark = pytest.mark.unit_time
+
+    @pytest.mark.parametrize("schedule", [
+        "*/10 6-13 * * 1-5",
+        "0 1 * * 0-4",
+        "59 23 * * *",
+        "0 12 1 * 1",
+        "30 8 * jan,feb sun",
+        "@daily",
+    ])
+    def test_matches_croniter_across_a_week(self, schedule):
+        match = _compile_cron(schedule)
+        assert match is not None
+        start = make_pacific_time(month=1, day=26, hour=0, minute=0)
+        end = start + timedelta(days=7)
+        cron = croniter(schedule, start - timedelta(seconds=1))
+        expected = set()
+        while (fire := cron.get_next(datetime)) < end:
+            expected.add(fire)
+        for minute in range(7 * 24 * 60):
+            now = start + timedelta(minutes=minute)
+            assert match(now) is (now in expected), now
+
+    def test_unsupported_expression_returns_none(self):
+        assert _compile_cron("0 0 L * *") is None
+        assert _compile_cron("0 0 * * 5#2") is None
+
+    def test_fallback_expression_still_runs(self):
+        task = {"name": "last_day", "schedule": "0 0 L * *", "command": ["echo"]}
+        assert should_task_run(task, make_pacific_time(day=28, hour=0, minute=0, second=10), {}) is True
+        assert should_task_run(task, make_pacific_time(day=27, hour=0, minute=0, second=10), {}) is False
 
-    def test_allows_run_different_day(self, sample_task):
-        now = make_pacific_time(hour=1, minute=0)
-        last_runs = {"test_task": "2026-02-18 01"}
-        assert should_task_run(sample_task, now, last_runs) is True
-
-    def test_daily_runs_on_weekends(self, sample_task):
-        # Feb 21, 2026 is a Saturday
-        now = make_pacific_time(month=2, day=21, hour=1, minute=0)
-        assert should_task_run(sample_task, now, {}) is True
-
-    def test_weekday_task_runs_on_weekday(self, weekday_task):
-        # Feb 19, 2026 is a Thursday
-        now = make_pacific_time(hour=9, minute=30)
-        assert should_task_run(weekday_task, now, {}) is True
-
-    def test_weekday_task_skips_saturday(self, weekday_task):
-        # Feb 21, 2026 is a Saturday
-        now = make_pacific_time(month=2, day=21, hour=9, minute=30)
-        assert should_task_run(weekday_task, now, {}) is False
-
-    def test_weekday_task_skips_sunday(self, weekday_task):
-        # Feb 22, 2026 is a Sunday
-        now = make_pacific_time(month=2, day=22, hour=9, minute=30)
-        assert should_task_run(weekday_task, now, {}) is False
-
-    def test_unrelated_task_last_run_does_not_affect(self, sample_task):
-        now = make_pacific_time(hour=1, minute=0)
-        last_runs = {"other_task": "2026-02-19 01"}
-        assert should_task_run(sample_task, now, last_runs) is True
 
+# --- run_task tests ---
 
-# --- Cron should_task_run tests ---
+_EXC_CASES = [
+    (subprocess.TimeoutExpired(cmd="echo", timeout=10), 1),
+    (OSError("Command not found"), 1),
+]
 
-class TestShouldTaskRunCron:
-    def test_runs_at_matching_time(self, cron_task):
-        """Cron '0 1 * * *' should fire at 01:00."""
-        now = make_pacific_time(hour=1, minute=0, second=15)
-        assert should_task_run(cron_task, now, {}) is True
-
-    def test_does_not_run_at_non_matching_time(self, cron_task):
-        """Cron '0 1 * * *' should NOT fire at 02:00."""
-        now = make_pacific_time(hour=2, minute=0)
-        assert should_task_run(cron_task, now, {}) is False
-
-    def test_does_not_run_at_wrong_minute(self, cron_task):
-        """Cron '0 1 * * *' should NOT fire at 01:30."""
-        now = make_pacific_time(hour=1, minute=30)
-        assert should_task_run(cron_task, now, {}) is False
-
-    def test_prevents_duplicate_run_same_minute(self, cron_task):
-        now = make_pacific_time(hour=1, minute=0, second=15)
-        last_runs = {"cron_task": "2026-02-19 01:00"}
-        assert should_task_run(cron_task, now, last_runs) is False
-
-    def test_allows_run_different_minute(self, cron_task):
-        now = make_pacific_time(hour=1, minute=0, second=15)
-        last_runs = {"cron_task": "2026-02-19 00:50"}
-        assert should_task_run(cron_task, now, last_runs) is True
-
-    def test_every_10_min_runs_at_6_00(self, cron_weekday_task):
-        """'*/10 6-13 * * 1-5' should fire at 06:00 on Thursday."""
-        now = make_pacific_time(hour=6, minute=0, second=10)
-        assert should_task_run(cron_weekday_task, now, {}) is True
-
-    def test_every_10_min_runs_at_6_10(self, cron_weekday_task):
-        now = make_pacific_time(hour=6, minute=10, second=10)
-        assert should_task_run(cron_weekday_task, now, {}) is True
-
-    def test_every_10_min_runs_at_6_20(self, cron_weekday_task):
-        now = make_pacific_time(hour=6, minute=20, second=5)
-        assert should_task_run(cron_weekday_task, now, {}) is True
-
-    def test_every_10_min_skips_6_05(self, cron_weekday_task):
-        """'*/10' should NOT fire at :05."""
-        now = make_pacific_time(hour=6, minute=5)
-        assert should_task_run(cron_weekday_task, now, {}) is False
-
-    def test_every_10_min_skips_before_6am(self, cron_weekday_task):
-        """Hour range 6-13 should not fire at 5:00."""
-        now = make_pacific_time(hour=5, minute=0, second=10)
-        assert should_task_run(cron_weekday_task, now, {}) is False
-
-    def test_every_10_min_skips_after_1pm(self, cron_weekday_task):
-        """Hour range 6-13 should not fire at 14:00."""
-        now = make_pacific_time(hour=14, minute=0, second=10)
-        assert should_task_run(cron_weekday_task, now, {}) is False
-
-    def test_every_10_min_runs_at_13_50(self, cron_weekday_task):
-        """Last slot in 6-13 range: 13:50."""
-        now = make_pacific_time(hour=13, minute=50, second=10)
-        assert should_task_run(cron_weekday_task, now, {}) is True
-
-    def test_weekday_cron_skips_saturday(self, cron_weekday_task):
-        """'1-5' means Mon-Fri. Saturday should be skipped."""
-        # Feb 21, 2026 is Saturday
-        now = make_pacific_time(month=2, day=21, hour=6, minute=0, second=10)
-        assert should_task_run(cron_weekday_task, now, {}) is False
-
-    def test_weekday_cron_skips_sunday(self, cron_weekday_task):
-        """Sunday should be skipped."""
-        # Feb 22, 2026 is Sunday
-        now = make_pacific_time(month=2, day=22, hour=6, minute=0, second=10)
-        assert should_task_run(cron_weekday_task, now, {}) is False
-
-    def test_daily_cron_runs_on_weekend(self, cron_task):
-        """'0 1 * * *' has no day filter, should run Saturday."""
-        now = make_pacific_time(month=2, day=21, hour=1, minute=0, second=10)
-        assert should_task_run(cron_task, now, {}) is True
 
+@pytest.fixture
+def mock_sub_run(monkeypatch):
+    """Replace subprocess.run inside scheduler with a MagicMock."""
+    mock = MagicMock()
+    monkeypatch.setattr('scheduler.subprocess.run', mock)
+    return mock
 
-# --- run_task tests ---
 
 class TestRunTask:
-    @patch('scheduler.subprocess.run')
-    def test_successful_execution(self, mock_run, sample_task):
-        mock_run.return_value = MagicMock(
+    pytestmark = pytest.mark.unit_proc
+
+    def test_successful_execution(self, mock_sub_run, sample_task):
+        mock_sub_run.return_value = SimpleNamespace(
             returncode=0,
             stdout="Task completed\n",
             stderr=""
         )
         result = run_task(sample_task)
         assert result == 0
-        mock_run.assert_called_once_with(
-            ["echo", "hello"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
+        assert mock_sub_run.call_count == 1
+        assert mock_sub_run.call_args.args == (["echo", "hello"],)
+        assert mock_sub_run.call_args.kwargs == {"capture_output": True, "text": True, "timeout": 10}
 
-    @patch('scheduler.subprocess.run')
-    def test_failed_execution(self, mock_run, sample_task):
-        mock_run.return_value = MagicMock(
+    def test_failed_execution(self, mock_sub_run, sample_task):
+        mock_sub_run.return_value = SimpleNamespace(
             returncode=1,
             stdout="",
             stderr="Something went wrong\n"
@@ -290,84 +330,77 @@ class TestRunTask:
         result = run_task(sample_task)
         assert result == 1
 
-    @patch('scheduler.subprocess.run')
-    def test_timeout_handling(self, mock_run, sample_task):
-        mock_run.side_effect = subprocess.TimeoutExpired(cmd="echo", timeout=10)
-        result = run_task(sample_task)
-        assert result == 1
+    def test_output_logged_as_one_record(self, mock_sub_run, sample_task, caplog):
+        mock_sub_run.return_value = SimpleNamespace(returncode=0, stdout="line 1\nline 2\n", stderr="")
+        with caplog.at_level("INFO", logger="scheduler"):
+            run_task(sample_task)
+        assert "[test_task] line 1\n[test_task] line 2" in caplog.messages
 
-    @patch('scheduler.subprocess.run')
-    def test_exception_handling(self, mock_run, sample_task):
-        mock_run.side_effect = OSError("Command not found")
-        result = run_task(sample_task)
-        assert result == 1
+    @pytest.mark.parametrize("exc,expected", _EXC_CASES, ids=["timeout", "oserror"])
+    def test_error_paths(self, mock_sub_run, sample_task, exc, expected):
+        mock_sub_run.side_effect = exc
+        assert run_task(sample_task) == expected
 
-    @patch('scheduler.subprocess.run')
-    def test_uses_default_timeout(self, mock_run):
+    def test_uses_default_timeout(self, mock_sub_run):
         task = {
             "name": "no_timeout",
             "command": ["echo", "test"],
         }
-        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
+        mock_sub_run.return_value = SimpleNamespace(returncode=0, stdout="", stderr="")
         run_task(task)
-        mock_run.assert_called_once_with(
-            ["echo", "test"],
-            capture_output=True,
-            text=True,
-            timeout=120,
-        )
+        assert mock_sub_run.call_count == 1
+        assert mock_sub_run.call_args.args == (["echo", "test"],)
+        assert mock_sub_run.call_args.kwargs == {"capture_output": True, "text": True, "timeout": 120}
 
 
 # --- run_http_task tests ---
 
 class TestRunHttpTask:
-    @patch('scheduler.requests.request')
+    pytestmark = pytest.mark.unit_proc
+
+    @pytest.fixture(autouse=True)
+    def mock_request(self, monkeypatch):
+        """Replace the shared session's request method with a MagicMock."""
+        mock = MagicMock()
+        monkeypatch.setattr('scheduler._SESSION.request', mock)
+        return mock
+
     def test_successful_post(self, mock_request, http_task):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = '{"status": "ok"}'
-        mock_request.return_value = mock_response
+        mock_request.return_value = SimpleNamespace(status_code=200, text='{"status": "ok"}')
 
         result = run_http_task(http_task)
 
         assert result == 0
-        mock_request.assert_called_once_with(
-            method="POST",
-            url="http://backendv2:8500/tos-generate",
-            headers={"Content-Type": "application/json"},
-            json={"days": 1},
-            timeout=120,
-        )
+        assert mock_request.call_count == 1
+        assert mock_request.call_args.kwargs == {
+            "method": "POST",
+            "url": "http://backendv2:8500/tos-generate",
+            "headers": {"Content-Type": "application/json"},
+            "json": {"days": 1},
+            "timeout": 120,
+        }
 
-    @patch('scheduler.requests.request')
     def test_unexpected_status_code(self, mock_request, http_task):
-        mock_response = MagicMock()
-        mock_response.status_code = 500
-        mock_response.text = 'Internal Server Error'
-        mock_request.return_value = mock_response
+        mock_request.return_value = SimpleNamespace(status_code=500, text='Internal Server Error')
 
         result = run_http_task(http_task)
         assert result == 1
 
-    @patch('scheduler.requests.request')
     def test_connection_error(self, mock_request, http_task):
-        mock_request.side_effect = __import__('requests').ConnectionError("refused")
+        mock_request.side_effect = _RequestsConnError("refused")
         result = run_http_task(http_task)
         assert result == 1
 
-    @patch('scheduler.requests.request')
     def test_timeout_error(self, mock_request, http_task):
-        mock_request.side_effect = __import__('requests').Timeout("timed out")
+        mock_request.side_effect = _RequestsTimeout("timed out")
         result = run_http_task(http_task)
         assert result == 1
 
-    @patch('scheduler.requests.request')
     def test_generic_exception(self, mock_request, http_task):
         mock_request.side_effect = RuntimeError("something broke")
         result = run_http_task(http_task)
         assert result == 1
 
-    @patch('scheduler.requests.request')
     def test_get_request_no_body(self, mock_request):
         task = {
             "name": "get_task",
@@ -380,22 +413,19 @@ class TestRunHttpTask:
             },
             "timeout": 30,
         }
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = "OK"
-        mock_request.return_value = mock_response
+        mock_request.return_value = SimpleNamespace(status_code=200, text="OK")
 
         result = run_http_task(task)
         assert result == 0
-        mock_request.assert_called_once_with(
-            method="GET",
-            url="http://example.com/health",
-            headers={},
-            json=None,
-            timeout=30,
-        )
+        assert mock_request.call_count == 1
+        assert mock_request.call_args.kwargs == {
+            "method": "GET",
+            "url": "http://example.com/health",
+            "headers": {},
+            "json": None,
+            "timeout": 30,
+        }
 
-    @patch('scheduler.requests.request')
     def test_multiple_expected_status(self, mock_request):
         task = {
             "name": "multi_status",
@@ -408,68 +438,81 @@ class TestRunHttpTask:
             },
             "timeout": 30,
         }
-        mock_response = MagicMock()
-        mock_response.status_code = 201
-        mock_response.text = "Created"
-        mock_request.return_value = mock_response
+        mock_request.return_value = SimpleNamespace(status_code=201, text="Created")
 
         result = run_http_task(task)
         assert result == 0
 
-    @patch('scheduler.requests.request')
     def test_empty_body_sends_no_json(self, mock_request, http_task):
         """Empty dict body should still send json={}."""
-        http_task["http"]["body"] = {}
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = ""
-        mock_request.return_value = mock_response
+        task = {**http_task, "http": {**http_task["http"], "body": {}}}
+        mock_request.return_value = SimpleNamespace(status_code=200, text="")
 
-        run_http_task(http_task)
+        run_http_task(task)
         # Empty dict is falsy, so json=None
-        call_kwargs = mock_request.call_args[1]
+        call_kwargs = mock_request.call_args.kwargs
         assert call_kwargs["json"] is None
 
 
 # --- load_tasks tests ---
 
+_CORPUS = {
+    "legacy": [
+        {"name": "t1", "hour": 0, "minute": 0, "days": "daily", "command": ["echo", "hi"]},
+    ],
+    "cron": [
+        {"name": "t1", "schedule": "0 1 * * *", "type": "command", "command": ["echo", "hi"]},
+    ],
+    "mixed": [
+        {"name": "legacy", "hour": 1, "minute": 0, "days": "daily", "command": ["echo", "1"]},
+        {"name": "cron", "schedule": "0 2 * * *", "type": "command", "command": ["echo", "2"]},
+        {"name": "http", "schedule": "*/10 6-13 * * 1-5", "type": "http",
+         "http": {"method": "POST", "url": "http://localhost/api", "expected_status": [200]}},
+    ],
+    "multi": [
+        {"name": "t1", "hour": 0, "minute": 0, "days": "daily", "command": ["echo", "1"]},
+        {"name": "t2", "hour": 12, "minute": 30, "days": "weekdays", "command": ["echo", "2"]},
+    ],
+}
+
+
+def _split_corpus(loaded):
+    """Slice a loaded corpus back into its _CORPUS groups."""
+    groups, start = {}, 0
+    for key, tasks in _CORPUS.items():
+        groups[key] = loaded[start:start + len(tasks)]
+        start += len(tasks)
+    return groups
+
+
+@pytest.fixture(scope="session")
+def corpus_path(tasks_json):
+    """Write every _CORPUS group to one config file."""
+    return tasks_json([task for tasks in _CORPUS.values() for task in tasks])
+
+
+@pytest.fixture(scope="session")
+def corpus(corpus_path):
+    """Load every _CORPUS group through load_tasks in a single file read."""
+    return _split_corpus(load_tasks(corpus_path))
+
+
 class TestLoadTasks:
-    def test_loads_valid_legacy_config(self, tasks_json):
-        tasks = [
-            {"name": "t1", "hour": 0, "minute": 0, "days": "daily", "command": ["echo", "hi"]},
-        ]
-        path = tasks_json(tasks)
-        loaded = load_tasks(path)
+    pytestmark = pytest.mark.unit_io
+
+    def test_loads_valid_legacy_config(self, corpus):
+        loaded = corpus["legacy"]
         assert len(loaded) == 1
         assert loaded[0]["name"] == "t1"
 
-    def test_loads_valid_cron_config(self, tasks_json):
-        tasks = [
-            {"name": "t1", "schedule": "0 1 * * *", "type": "command", "command": ["echo", "hi"]},
-        ]
-        path = tasks_json(tasks)
-        loaded = load_tasks(path)
-        assert len(loaded) == 1
+    def test_loads_valid_cron_config(self, corpus):
+        assert len(corpus["cron"]) == 1
 
-    def test_loads_mixed_config(self, tasks_json):
-        tasks = [
-            {"name": "legacy", "hour": 1, "minute": 0, "days": "daily", "command": ["echo", "1"]},
-            {"name": "cron", "schedule": "0 2 * * *", "type": "command", "command": ["echo", "2"]},
-            {"name": "http", "schedule": "*/10 6-13 * * 1-5", "type": "http",
-             "http": {"method": "POST", "url": "http://localhost/api", "expected_status": [200]}},
-        ]
-        path = tasks_json(tasks)
-        loaded = load_tasks(path)
-        assert len(loaded) == 3
+    def test_loads_mixed_config(self, corpus):
+        assert len(corpus["mixed"]) == 3
 
-    def test_loads_multiple_tasks(self, tasks_json):
-        tasks = [
-            {"name": "t1", "hour": 0, "minute": 0, "days": "daily", "command": ["echo", "1"]},
-            {"name": "t2", "hour": 12, "minute": 30, "days": "weekdays", "command": ["echo", "2"]},
-        ]
-        path = tasks_json(tasks)
-        loaded = load_tasks(path)
-        assert len(loaded) == 2
+    def test_loads_multiple_tasks(self, corpus):
+        assert len(corpus["multi"]) == 2
 
     def test_missing_file_raises(self):
         with pytest.raises(FileNotFoundError):
@@ -480,136 +523,176 @@ class TestLoadTasks:
         with pytest.raises(ValueError, match="JSON array"):
             load_tasks(path)
 
-    def test_loads_from_env_var(self, tasks_json, monkeypatch):
-        tasks = [
-            {"name": "env_task", "hour": 5, "minute": 0, "days": "daily", "command": ["echo"]},
-        ]
-        path = tasks_json(tasks)
-        monkeypatch.setenv("TASK_CONFIG", path)
+    def test_loads_from_env_var(self, corpus_path, monkeypatch):
+        monkeypatch.setenv("TASK_CONFIG", corpus_path)
         loaded = load_tasks()
-        assert loaded[0]["name"] == "env_task"
+        assert _split_corpus(loaded)["legacy"][0]["name"] == "t1"
+        assert len(loaded) == sum(len(tasks) for tasks in _CORPUS.values())
 
+    @pytest.mark.skipif(not _BUNDLED_TASKS.exists(), reason="no bundled tasks.json")
     def test_loads_bundled_tasks_json(self):
         """The bundled tasks.json in the repo should be valid."""
-        bundled = Path(__file__).parent / "tasks.json"
-        if bundled.exists():
-            loaded = load_tasks(str(bundled))
-            assert len(loaded) >= 1
+        loaded = load_tasks(str(_BUNDLED_TASKS))
+        assert len(loaded) >= 1
+
+
+# --- maybe_reload tests ---
+
+class TestMaybeReload:
+    pytestmark = pytest.mark.unit_io
+
+    @pytest.fixture(autouse=True)
+    def _reset_cache(self, monkeypatch):
+        monkeypatch.setattr("scheduler._CFG_MTIME", None)
+        monkeypatch.setattr("scheduler._CFG_TASKS", None)
+
+    def _bump_mtime(self, path):
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_unchanged_file_is_not_reparsed(self, tasks_json):
+        path = tasks_json([{"name": "t1", "schedule": "0 1 * * *", "command": ["echo"]}])
+        first = maybe_reload(path)
+        assert maybe_reload(path) is first
+
+    def test_reloads_when_mtime_changes(self, tasks_json):
+        path = tasks_json([{"name": "t1", "schedule": "0 1 * * *", "command": ["echo"]}])
+        maybe_reload(path)
+        Path(path).write_text(json.dumps([{"name": "t2", "schedule": "0 2 * * *", "command": ["echo"]}]))
+        self._bump_mtime(path)
+        assert [t["name"] for t in maybe_reload(path)] == ["t2"]
+
+    def test_keeps_previous_tasks_on_invalid_reload(self, tasks_json):
+        path = tasks_json([{"name": "t1", "schedule": "0 1 * * *", "command": ["echo"]}])
+        first = maybe_reload(path)
+        Path(path).write_text("{not json")
+        self._bump_mtime(path)
+        assert maybe_reload(path) is first
+
+    @pytest.mark.parametrize("bad_task", [
+        pytest.param({"name": "t1", "hour": "1", "minute": 0, "days": "daily", "command": ["echo"]},
+                     id="string_hour"),
+        pytest.param({"name": "t1", "schedule": "0 1 * * *", "type": "http",
+                      "http": {"url": "http://localhost/api", "expected_status": 200}},
+                     id="scalar_expected_status"),
+        pytest.param({"name": "t1", "schedule": "0 1 * * *", "type": "http",
+                      "http": {"method": 5, "url": "http://localhost/api"}},
+                     id="non_string_method"),
+    ])
+    def test_keeps_previous_tasks_on_wrongly_typed_reload(self, tasks_json, bad_task):
+        path = tasks_json([{"name": "t1", "schedule": "0 1 * * *", "command": ["echo"]}])
+        first = maybe_reload(path)
+        Path(path).write_text(json.dumps([bad_task]))
+        self._bump_mtime(path)
+        assert maybe_reload(path) is first
+
+    def test_first_load_raises(self):
+        with pytest.raises(FileNotFoundError):
+            maybe_reload("/nonexistent/tasks.json")
 
+    def test_main_exits_when_first_load_fails(self, monkeypatch):
+        monkeypatch.setenv("TASK_CONFIG", "/nonexistent/tasks.json")
+        with pytest.raises(FileNotFoundError):
+            main()
 
-# --- validate_task tests ---
 
-class TestValidateTask:
-    # Legacy validation
-    def test_valid_legacy_task_passes(self):
-        task = {"name": "t", "hour": 0, "minute": 0, "days": "daily", "command": ["echo"]}
-        validate_task(task)  # Should not raise
-
-    def test_missing_name_raises(self):
-        task = {"hour": 0, "minute": 0, "days": "daily", "command": ["echo"]}
-        with pytest.raises(ValueError, match="name"):
-            validate_task(task)
-
-    def test_invalid_days_raises(self):
-        task = {"name": "t", "hour": 0, "minute": 0, "days": "monthly", "command": ["echo"]}
-        with pytest.raises(ValueError, match="invalid days"):
-            validate_task(task)
-
-    def test_invalid_hour_raises(self):
-        task = {"name": "t", "hour": 25, "minute": 0, "days": "daily", "command": ["echo"]}
-        with pytest.raises(ValueError, match="invalid hour"):
-            validate_task(task)
-
-    def test_invalid_minute_raises(self):
-        task = {"name": "t", "hour": 0, "minute": 61, "days": "daily", "command": ["echo"]}
-        with pytest.raises(ValueError, match="invalid minute"):
-            validate_task(task)
-
-    def test_empty_command_raises(self):
-        task = {"name": "t", "hour": 0, "minute": 0, "days": "daily", "command": []}
-        with pytest.raises(ValueError, match="non-empty list"):
-            validate_task(task)
-
-    def test_string_command_raises(self):
-        task = {"name": "t", "hour": 0, "minute": 0, "days": "daily", "command": "echo hi"}
-        with pytest.raises(ValueError, match="non-empty list"):
-            validate_task(task)
+# --- validate_task tests ---
 
-    def test_non_dict_raises(self):
-        with pytest.raises(ValueError, match="must be a dict"):
-            validate_task("not a dict")
+# Minimal valid tasks of each kind; tests derive variants from them
+_VALID_LEGACY_TASK = MappingProxyType({
+    "name": "t", "hour": 0, "minute": 0, "days": "daily", "command": ["echo"],
+})
+_VALID_CRON_TASK = MappingProxyType({
+    "name": "t", "schedule": "0 1 * * *", "type": "command", "command": ["echo"],
+})
+_VALID_HTTP_TASK = MappingProxyType({
+    "name": "t", "schedule": "0 1 * * *", "type": "http",
+    "http": {"method": "POST", "url": "http://localhost/api"},
+})
+_MISSING = object()  # marks a key to drop from a derived task
+
+
+def _derive_task(base, changes):
+    """Build a fresh task dict from base with changes applied (_MISSING drops a key)."""
+    task = {**base, **changes}
+    return {key: value for key, value in task.items() if value is not _MISSING}
+
+
+_VALID_TASK_CASES = (
+    pytest.param(_VALID_LEGACY_TASK, id="legacy"),
+    pytest.param(_VALID_CRON_TASK, id="cron"),
+    pytest.param(_VALID_HTTP_TASK, id="http"),
+)
 
+# (base, changes, error regex) for every validate_task failure mode
+_INVALID_TASK_CASES = (
+    # Legacy validation
+    pytest.param(_VALID_LEGACY_TASK, {"name": _MISSING}, "name", id="missing_name"),
+    pytest.param(_VALID_LEGACY_TASK, {"days": "monthly"}, "invalid days", id="invalid_days"),
+    pytest.param(_VALID_LEGACY_TASK, {"hour": 25}, "invalid hour", id="invalid_hour"),
+    pytest.param(_VALID_LEGACY_TASK, {"minute": 61}, "invalid minute", id="invalid_minute"),
+    pytest.param(_VALID_LEGACY_TASK, {"command": []}, "non-empty list", id="empty_command"),
+    pytest.param(_VALID_LEGACY_TASK, {"command": "echo hi"}, "non-empty list", id="string_command"),
     # Cron validation
-    def test_valid_cron_task_passes(self):
-        task = {"name": "t", "schedule": "0 1 * * *", "type": "command", "command": ["echo"]}
-        validate_task(task)
+    pytest.param(_VALID_CRON_TASK, {"schedule": "not a cron"}, "invalid cron",
+                 id="invalid_cron_expression"),
+    pytest.param(_VALID_CRON_TASK, {"schedule": "0 25 * * *"}, "invalid cron",
+                 id="cron_with_invalid_range"),
+    pytest.param(_VALID_CRON_TASK, {"schedule": 123}, "must be a string",
+                 id="cron_schedule_must_be_string"),
+    pytest.param(_VALID_CRON_TASK, {"type": "webhook"}, "invalid type", id="invalid_task_type"),
+    pytest.param(_VALID_CRON_TASK, {"command": _MISSING}, "requires a 'command' field",
+                 id="command_type_requires_command_field"),
+    # HTTP validation
+    pytest.param(_VALID_HTTP_TASK, {"http": _MISSING}, "requires an 'http' config",
+                 id="http_missing_config"),
+    pytest.param(_VALID_HTTP_TASK, {"http": {"method": "POST"}}, "missing required field: url",
+                 id="http_missing_url"),
+    pytest.param(_VALID_HTTP_TASK, {"http": {"method": "INVALID", "url": "http://localhost/api"}},
+                 "invalid HTTP method", id="http_invalid_method"),
+    pytest.param(_VALID_HTTP_TASK, {"http": "not a dict"}, "http config must be a dict",
+                 id="http_config_must_be_dict"),
+    pytest.param(_VALID_HTTP_TASK, {"http": {"url": "http://localhost/api", "expected_status": 200}},
+                 "expected_status must be a list of ints", id="http_scalar_expected_status"),
+)
 
-    def test_invalid_cron_expression_raises(self):
-        task = {"name": "t", "schedule": "not a cron", "type": "command", "command": ["echo"]}
-        with pytest.raises(ValueError, match="invalid cron"):
-            validate_task(task)
 
-    def test_cron_with_invalid_range_raises(self):
-        task = {"name": "t", "schedule": "0 25 * * *", "type": "command", "command": ["echo"]}
-        with pytest.raises(ValueError, match="invalid cron"):
-            validate_task(task)
+class TestValidateTask:
+    pytestmark = pytest.mark.unit_validate
 
-    def test_cron_schedule_must_be_string(self):
-        task = {"name": "t", "schedule": 123, "type": "command", "command": ["echo"]}
-        with pytest.raises(ValueError, match="must be a string"):
-            validate_task(task)
+    @pytest.mark.parametrize("base", _VALID_TASK_CASES)
+    def test_validate_passes(self, base):
+        validate_task(_derive_task(base, {}))  # Should not raise
 
-    # HTTP validation
-    def test_valid_http_task_passes(self):
-        task = {
-            "name": "t", "schedule": "0 1 * * *", "type": "http",
-            "http": {"method": "POST", "url": "http://localhost/api"},
-        }
-        validate_task(task)
+    @pytest.mark.parametrize("base,changes,err", _INVALID_TASK_CASES)
+    def test_validate_raises(self, base, changes, err):
+        with pytest.raises(ValueError, match=err):
+            validate_task(_derive_task(base, changes))
 
-    def test_http_missing_config_raises(self):
-        task = {"name": "t", "schedule": "0 1 * * *", "type": "http"}
-        with pytest.raises(ValueError, match="requires an 'http' config"):
-            validate_task(task)
-
-    def test_http_missing_url_raises(self):
-        task = {
-            "name": "t", "schedule": "0 1 * * *", "type": "http",
-            "http": {"method": "POST"},
-        }
-        with pytest.raises(ValueError, match="missing required field: url"):
-            validate_task(task)
+    def test_non_dict_raises(self):
+        with pytest.raises(ValueError, match="must be a dict"):
+            validate_task("not a dict")
 
-    def test_http_invalid_method_raises(self):
+    def test_http_task_is_prepared(self):
         task = {
             "name": "t", "schedule": "0 1 * * *", "type": "http",
-            "http": {"method": "INVALID", "url": "http://localhost/api"},
+            "http": {"method": "post", "url": "http://localhost/api", "expected_status": [200, 201]},
         }
-        with pytest.raises(ValueError, match="invalid HTTP method"):
-            validate_task(task)
-
-    def test_http_config_must_be_dict(self):
-        task = {
-            "name": "t", "schedule": "0 1 * * *", "type": "http",
-            "http": "not a dict",
+        validate_task(task)
+        assert task["_http_prepared"] == {
+            "method": "POST",
+            "url": "http://localhost/api",
+            "headers": {},
+            "json": None,
+            "expected_status": frozenset({200, 201}),
         }
-        with pytest.raises(ValueError, match="http config must be a dict"):
-            validate_task(task)
-
-    def test_invalid_task_type_raises(self):
-        task = {"name": "t", "schedule": "0 1 * * *", "type": "webhook", "command": ["echo"]}
-        with pytest.raises(ValueError, match="invalid type"):
-            validate_task(task)
-
-    def test_command_type_requires_command_field(self):
-        task = {"name": "t", "schedule": "0 1 * * *", "type": "command"}
-        with pytest.raises(ValueError, match="requires a 'command' field"):
-            validate_task(task)
 
 
 # --- Dedup key tests ---
 
 class TestDedupKey:
+    pytestmark = pytest.mark.unit_time
+
     def test_cron_uses_minute_precision(self, cron_task):
         now = make_pacific_time(hour=1, minute=0)
         key = _get_dedup_key(cron_task, now)
@@ -621,9 +704,27 @@ class TestDedupKey:
         assert key == "2026-02-19 01"
 
 
+# --- Run record tests ---
+
+class TestRecordRun:
+    pytestmark = pytest.mark.unit_time
+
+    def test_stores_dedup_key(self, cron_task):
+        last_runs = OrderedDict()
+        _record_run(last_runs, cron_task, make_pacific_time(hour=1, minute=0), 4)
+        assert last_runs == {"cron_task": "2026-02-19 01:00"}
+
+    def test_evicts_least_recently_run(self, cron_task):
+        last_runs = OrderedDict([("old_a", "x"), ("cron_task", "y"), ("old_b", "z")])
+        _record_run(last_runs, cron_task, make_pacific_time(hour=1, minute=0), 2)
+        assert list(last_runs) == ["old_b", "cron_task"]
+
+
 # --- Format schedule tests ---
 
 class TestFormatSchedule:
+    pytestmark = pytest.mark.unit_time
+
     def test_cron_format(self, cron_task):
         assert _format_schedule(cron_task) == "cron(0 1 * * *)"
 
@@ -632,3 +733,164 @@ class TestFormatSchedule:
 
     def test_legacy_weekday_format(self, weekday_task):
         assert _format_schedule(weekday_task) == "09:30 Pacific, weekdays only"
+
+
+# --- Schedule tests ---
+
+class TestCronExpression:
+    pytestmark = pytest.mark.unit_time
+
+    def test_cron_task_uses_schedule(self, cron_weekday_task):
+        assert _cron_expression(cron_weekday_task) == "*/10 6-13 * * 1-5"
+
+    def test_legacy_daily(self, sample_task):
+        assert _cron_expression(sample_task) == "0 1 * * *"
+
+    def test_legacy_weekdays(self, weekday_task):
+        assert _cron_expression(weekday_task) == "30 9 * * 1-5"
+
+
+class TestBuildSchedule:
+    pytestmark = pytest.mark.unit_time
+
+    def test_earliest_fire_first(self, sample_task, cron_weekday_task):
+        now = make_pacific_time(hour=5, minute=0)
+        schedule = _build_schedule([sample_task, cron_weekday_task], now)
+        next_fire, index, _ = schedule[0]
+        assert index == 1
+        assert next_fire == make_pacific_time(hour=6, minute=0).timestamp()
+
+    def test_next_fire_rolls_to_next_day(self, sample_task):
+        now = make_pacific_time(hour=1, minute=0, second=30)
+        schedule = _build_schedule([sample_task], now)
+        assert schedule[0][0] == make_pacific_time(day=20, hour=1, minute=0).timestamp()
+
+    def test_task_runs_when_woken_at_fire_time(self, cron_weekday_task):
+        now = make_pacific_time(hour=5, minute=55)
+        next_fire = _build_schedule([cron_weekday_task], now)[0][0]
+        woken = datetime.fromtimestamp(next_fire + 0.001, PACIFIC_TZ)
+        assert should_task_run(cron_weekday_task, woken, {}) is True
+
+
+# --- Dispatch loop tests ---
+
+class _StubExecutor:
+    """Record submitted task names; runs finish immediately unless pending=True."""
+
+    def __init__(self, pending=False):
+        self.pending = pending
+        self.submitted = []
+
+    def submit(self, fn, task):
+        self.submitted.append(task["name"])
+        future = Future()
+        if not self.pending:
+            future.set_result(0)
+        return future
+
+
+def _simulate(tasks, start, minutes, executor=None, last_runs=None):
+    """Drive _run_due once per minute (at :00.5) from start, stepping real time.
+
+    Steps are taken in UTC so wall-clock repeats and gaps around DST behave
+    like the live clock. Returns the (name, local time) of every dispatch.
+    """
+    executor = executor or _StubExecutor()
+    last_runs = OrderedDict() if last_runs is None else last_runs
+    in_flight = {}
+    minute_start = start.replace(second=0, microsecond=0) - timedelta(microseconds=1)
+    schedule = _build_schedule(tasks, minute_start)
+    start_utc = start.astimezone(timezone.utc)
+    fired = []
+    for minute in range(minutes):
+        now = (start_utc + timedelta(minutes=minute, milliseconds=500)).astimezone(PACIFIC_TZ)
+        seen = len(executor.submitted)
+        _run_due(schedule, tasks, now, last_runs, in_flight, executor)
+        fired += [(name, now.strftime("%H:%M %Z")) for name in executor.submitted[seen:]]
+    return fired
+
+
+class TestRunDue:
+    pytestmark = pytest.mark.unit_time
+
+    def test_normal_weekday(self, cron_weekday_task):
+        fired = _simulate([cron_weekday_task], make_pacific_time(hour=5, minute=55), 9 * 60)
+        assert [when for _, when in fired] == [
+            f"{hour:02d}:{minute:02d} PST" for hour in range(6, 14) for minute in range(0, 60, 10)
+        ]
+
+    def test_rearms_to_next_fire(self, cron_task):
+        now = make_pacific_time(hour=1, minute=0, second=1)
+        schedule = _build_schedule([cron_task], make_pacific_time(hour=0, minute=59))
+        _run_due(schedule, [cron_task], now, OrderedDict(), {}, _StubExecutor())
+        assert len(schedule) == 1
+        assert schedule[0][0] == make_pacific_time(day=20, hour=1, minute=0).timestamp()
+
+    def test_spring_forward_day(self):
+        tasks = [
+            {"name": "one", "schedule": "0 1 * * *", "command": ["echo"]},
+            {"name": "two", "schedule": "0 2 * * *", "command": ["echo"]},
+            {"name": "three", "schedule": "0 3 * * *", "command": ["echo"]},
+            {"name": "hourly", "schedule": "0 * * * *", "command": ["echo"]},
+        ]
+        # 2026-03-08: 02:00 PST jumps straight to 03:00 PDT, so the skipped
+        # 02:00 fire runs at 03:00 PDT instead
+        fired = _simulate(tasks, make_pacific_time(month=3, day=8, hour=0, minute=30), 3 * 60)
+        assert fired == [
+            ("one", "01:00 PST"), ("hourly", "01:00 PST"),
+            ("two", "03:00 PDT"), ("three", "03:00 PDT"), ("hourly", "03:00 PDT"),
+            ("hourly", "04:00 PDT"),
+        ]
+
+    def test_fall_back_day_does_not_spin(self):
+        tasks = [
+            {"name": "bundled", "schedule": "0 1 * * 0-4", "command": ["echo"]},
+            {"name": "hourly", "schedule": "0 * * * *", "command": ["echo"]},
+        ]
+        # 2026-11-01: 01:00-01:59 happens twice (PDT, then PST). The repeated
+        # 01:00 shares a dedup key with the first, so it runs once.
+        fired = _simulate(tasks, make_pacific_time(month=11, day=1, hour=0, minute=30), 4 * 60)
+        assert fired == [
+            ("bundled", "01:00 PDT"), ("hourly", "01:00 PDT"),
+            ("hourly", "02:00 PST"), ("hourly", "03:00 PST"),
+        ]
+
+    def test_fire_in_repeated_hour_is_rearmed_past_now(self, cron_task):
+        now = datetime(2026, 11, 1, 1, 0, 1, tzinfo=PACIFIC_TZ)  # first 01:00, PDT
+        schedule = _build_schedule([cron_task], make_pacific_time(month=11, day=1, hour=0, minute=59))
+        _run_due(schedule, [cron_task], now, OrderedDict(), {}, _StubExecutor())
+        assert schedule[0][0] > now.timestamp()
+
+    def test_skips_task_still_in_flight(self, cron_weekday_task):
+        executor = _StubExecutor(pending=True)
+        last_runs = OrderedDict()
+        fired = _simulate([cron_weekday_task], make_pacific_time(hour=5, minute=59), 12,
+                          executor=executor, last_runs=last_runs)
+        # 06:00 starts and never finishes, so the 06:10 fire is skipped unrecorded
+        assert fired == [("cron_weekday", "06:00 PST")]
+        assert last_runs == {"cron_weekday": "2026-02-19 06:00"}
+
+    def test_runs_again_once_previous_run_finished(self, cron_weekday_task):
+        fired = _simulate([cron_weekday_task], make_pacific_time(hour=5, minute=59), 12)
+        assert fired == [("cron_weekday", "06:00 PST"), ("cron_weekday", "06:10 PST")]
+
+    def test_reload_prunes_in_flight(self):
+        finished, running, renamed = Future(), Future(), Future()
+        finished.set_result(0)
+        in_flight = {"finished": finished, "running": running, "old_name": renamed}
+        tasks = [{"name": name, "schedule": "0 1 * * *", "command": ["echo"]}
+                 for name in ("finished", "running", "new_name")]
+        _prune_in_flight(in_flight, tasks)
+        assert in_flight == {"running": running}
+
+    def test_reload_mid_minute_fires_due_task(self, cron_weekday_task):
+        # The config is (re)loaded at 06:00:30; the 06:00 fire is still due
+        fired = _simulate([cron_weekday_task], make_pacific_time(hour=6, minute=0, second=30), 1)
+        assert fired == [("cron_weekday", "06:00 PST")]
+
+    def test_reload_mid_minute_does_not_refire(self, cron_weekday_task):
+        # The previous config already ran the 06:00 fire before the reload
+        last_runs = OrderedDict(cron_weekday="2026-02-19 06:00")
+        fired = _simulate([cron_weekday_task], make_pacific_time(hour=6, minute=0, second=30), 1,
+                          last_runs=last_runs)
+        assert fired == []